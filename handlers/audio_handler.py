@@ -1,7 +1,9 @@
 from telegram import Update
 from telegram.ext import ContextTypes
 from services.gemini_service import GeminiService
+from services.usage_ledger import usage_scope, QuotaExceededError, QUOTA_EXCEEDED_MESSAGE
 from utils.logger import get_logger
+import asyncio
 import io
 
 logger = get_logger(__name__)
@@ -23,6 +25,10 @@ async def handle_voice_message(update: Update, context: ContextTypes.DEFAULT_TYP
     if not attachment:
         return
 
+    if not gemini_service.ledger.has_quota(chat_id):
+        await context.bot.send_message(chat_id=chat_id, text=QUOTA_EXCEEDED_MESSAGE)
+        return
+
     status_message = await context.bot.send_message(chat_id=chat_id, text="Słucham... (Listening...)")
 
     try:
@@ -35,12 +41,15 @@ async def handle_voice_message(update: Update, context: ContextTypes.DEFAULT_TYP
 
         logger.info(f"Received audio file ({mime_type}) from user {chat_id}, processing with Gemini...")
 
-        text_response, audio_bytes = gemini_service.handle_audio_search_request(
-            audio_bytes=audio_bytes,
-            mime_type=mime_type,
-            play_audio=True, 
-            perform_search=False 
-        )
+        # Preprocessing and the Gemini calls are blocking; keep them off the event loop.
+        with usage_scope(chat_id, "voice"):
+            text_response, audio_bytes = await asyncio.to_thread(
+                gemini_service.handle_audio_search_request,
+                audio_bytes=audio_bytes,
+                mime_type=mime_type,
+                play_audio=True, 
+                perform_search=False 
+            )
 
         await context.bot.delete_message(chat_id=chat_id, message_id=status_message.message_id)
 
@@ -52,6 +61,9 @@ async def handle_voice_message(update: Update, context: ContextTypes.DEFAULT_TYP
         elif not text_response:
             await context.bot.send_message(chat_id=chat_id, text="Przepraszam, nie udało mi się przetworzyć Twojej wiadomości.")
 
+    except QuotaExceededError as e:
+        logger.info(f"{e}, aborting voice message")
+        await context.bot.send_message(chat_id=chat_id, text=QUOTA_EXCEEDED_MESSAGE)
     except Exception as e:
         logger.error(f"Error processing voice message: {e}")
         await context.bot.send_message(chat_id=chat_id, text="Przepraszam, wystąpił błąd podczas analizy dźwięku.")
@@ -1,11 +1,25 @@
-from telegram import Update
-from telegram.ext import ContextTypes
+from telegram import Message, Update
+from telegram.ext import ContextTypes, filters
 from services.gemini_service import GeminiService
+from services.usage_ledger import usage_scope, QuotaExceededError, QUOTA_EXCEEDED_MESSAGE
 from utils.logger import get_logger
+import asyncio
 import os
 
 logger = get_logger(__name__)
 
+# Telegram delivers an album as separate updates sharing a media_group_id;
+# buffer them this long before analysing the whole group at once.
+MEDIA_GROUP_WAIT_SECONDS = 1.5
+
+_media_groups: dict[str, list[Message]] = {}
+
+class _MediaGroupFilter(filters.MessageFilter):
+    def filter(self, message: Message) -> bool:
+        return message.media_group_id is not None
+
+MEDIA_GROUP = _MediaGroupFilter(name="MEDIA_GROUP")
+
 async def handle_photo_message(update: Update, context: ContextTypes.DEFAULT_TYPE, gemini_service: GeminiService):
     """
     Handles photo uploads with a text caption mentioning the bot.
@@ -17,10 +31,18 @@ async def handle_photo_message(update: Update, context: ContextTypes.DEFAULT_TYP
             logger.info('no photo is provided')
             return 
 
+        if message.media_group_id:
+            _buffer_media_group(message, context, gemini_service)
+            return
+
         caption = message.caption or ""
         if context.bot.username and f"@{context.bot.username}" not in caption:
             logger.info('bot is not mentioned')
             return 
+
+        if not gemini_service.ledger.has_quota(message.chat_id):
+            await message.reply_text(QUOTA_EXCEEDED_MESSAGE)
+            return
         file_id = message.photo[-1].file_id
         file = await context.bot.get_file(file_id)
         local_path = f"downloads/{file_id}.jpg"
@@ -38,7 +60,8 @@ async def handle_photo_message(update: Update, context: ContextTypes.DEFAULT_TYP
             
         logger.info(f"Image uploaded to Gemini: {uploaded_file}")
 
-        response_text = gemini_service.describe_image(uploaded_file, user_prompt)
+        with usage_scope(message.chat_id, "photo"):
+            response_text = gemini_service.describe_image(uploaded_file, user_prompt)
 
         reply_target = update.effective_message
         if reply_target:
@@ -48,6 +71,9 @@ async def handle_photo_message(update: Update, context: ContextTypes.DEFAULT_TYP
             
         logger.info(f"Response sent: {response_text}")
 
+    except QuotaExceededError as e:
+        logger.info(f"{e}, aborting photo message")
+        await context.bot.send_message(chat_id=update.effective_chat.id, text=QUOTA_EXCEEDED_MESSAGE)
     except Exception as e:
         logger.error(f"Error processing photo message: {e}")
         chat_id = update.effective_chat.id if update.effective_chat else None
@@ -57,4 +83,50 @@ async def handle_photo_message(update: Update, context: ContextTypes.DEFAULT_TYP
     finally:
         if local_path and os.path.exists(local_path):
             os.remove(local_path)
-            logger.info(f"Temporary file {local_path} deleted.")
\ No newline at end of file
+            logger.info(f"Temporary file {local_path} deleted.")
+
+def _buffer_media_group(message: Message, context: ContextTypes.DEFAULT_TYPE, gemini_service: GeminiService):
+    group = _media_groups.get(message.media_group_id)
+    if group is None:
+        _media_groups[message.media_group_id] = [message]
+        context.application.create_task(_process_media_group(message.media_group_id, context, gemini_service))
+    else:
+        group.append(message)
+
+async def _process_media_group(media_group_id: str, context: ContextTypes.DEFAULT_TYPE, gemini_service: GeminiService):
+    """
+    Downloads every photo of an album concurrently and analyses them in one model call.
+    """
+    captioned = None
+    try:
+        await asyncio.sleep(MEDIA_GROUP_WAIT_SECONDS)
+        messages = sorted(_media_groups.pop(media_group_id, []), key=lambda m: m.message_id)
+
+        captioned = next((m for m in messages if m.caption), None)
+        if not captioned or (context.bot.username and f"@{context.bot.username}" not in captioned.caption):
+            logger.info('bot is not mentioned in media group')
+            return
+
+        if not gemini_service.ledger.has_quota(captioned.chat_id):
+            await captioned.reply_text(QUOTA_EXCEEDED_MESSAGE)
+            return
+
+        files = await asyncio.gather(*(context.bot.get_file(m.photo[-1].file_id) for m in messages))
+        images = await asyncio.gather(*(f.download_as_bytearray() for f in files))
+        logger.info(f"Media group {media_group_id}: downloaded {len(images)} photos")
+
+        user_prompt = captioned.caption.replace(f"@{context.bot.username}", "").strip()
+        # describe_images blocks (hedge waits, retry sleeps); keep it off the event loop.
+        with usage_scope(captioned.chat_id, "album"):
+            response_text = await asyncio.to_thread(gemini_service.describe_images, [bytes(image) for image in images], user_prompt)
+
+        await captioned.reply_text(response_text)
+        logger.info(f"Response sent: {response_text}")
+
+    except QuotaExceededError as e:
+        logger.info(f"{e}, aborting media group {media_group_id}")
+        await context.bot.send_message(chat_id=captioned.chat_id, text=QUOTA_EXCEEDED_MESSAGE)
+    except Exception as e:
+        logger.error(f"Error processing media group {media_group_id}: {e}")
+        if captioned:
+            await context.bot.send_message(chat_id=captioned.chat_id, text="Przepraszam, coś poszło nie tak. Spróbuj ponownie.")
@@ -0,0 +1,31 @@
+from telegram import Update
+from telegram.ext import ContextTypes
+from services.quiz_service import QuizService
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+async def handle_poll_answer(update: Update, context: ContextTypes.DEFAULT_TYPE, quiz_service: QuizService):
+    """
+    Grades quiz poll answers against the stored key and posts the score once
+    a user has answered every question of a quiz. No model calls are made.
+    """
+    try:
+        answer = update.poll_answer
+        if not answer or not answer.user:
+            return
+
+        result = quiz_service.grade_answer(answer.poll_id, answer.user.id, list(answer.option_ids))
+        if not result:
+            return
+
+        logger.info(f"Poll {answer.poll_id} answered by {answer.user.id}: correct={result['correct']}")
+
+        if "score" in result:
+            name = answer.user.first_name or answer.user.username or "Uczeń"
+            await context.bot.send_message(
+                chat_id=result["chat_id"],
+                text=f"🏁 {name}: wynik quizu {result['score']}/{result['total']}."
+            )
+    except Exception as e:
+        logger.error(f"Error grading poll answer: {e}")
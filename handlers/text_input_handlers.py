@@ -1,16 +1,48 @@
 from telegram import Update
 from telegram.ext import ContextTypes
 from services.gemini_service import GeminiService
+from services.quiz_service import QuizService
+from services.telegram_bot import send_quiz
+from services.usage_ledger import usage_scope, QuotaExceededError, QUOTA_EXCEEDED_MESSAGE
 from utils.logger import get_logger
 from utils.init_environment import Config
 
 BOT_USERNAME = Config().BOT_USERNAME
 logger = get_logger(__name__)
 
-async def handle_text_command(update: Update, context: ContextTypes.DEFAULT_TYPE, gemini_service: GeminiService):
+def _command_name(text: str) -> str:
+    words = text.split(f"@{BOT_USERNAME}", 1)[-1].split()
+    return words[0] if words and words[0].startswith("/") else "help"
+
+async def handle_text_command(update: Update, context: ContextTypes.DEFAULT_TYPE, gemini_service: GeminiService, quiz_service: QuizService):
+    """
+    Attributes Gemini usage to the chat and command, and refuses model-backed
+    commands once the chat has used up its daily quota.
+    """
+    # Edited messages and channel posts also match the text filter.
+    message = update.effective_message
+    if message is None or not message.text:
+        return
+
+    chat_id = update.effective_chat.id
+    try:
+        command = _command_name(message.text)
+        if command != "/usage" and not gemini_service.ledger.has_quota(chat_id):
+            logger.info(f"Chat {chat_id} exceeded its daily quota, skipping {command}")
+            await context.bot.send_message(chat_id=chat_id, text=QUOTA_EXCEEDED_MESSAGE)
+            return
+    except Exception as e:
+        logger.error(f"Error occurred: {e} during text handler quota check")
+        await context.bot.send_message(chat_id=chat_id, text="An error occurred while processing your message.")
+        return
+
+    with usage_scope(chat_id, command):
+        await _handle_text_command(update, context, gemini_service, quiz_service)
+
+async def _handle_text_command(update: Update, context: ContextTypes.DEFAULT_TYPE, gemini_service: GeminiService, quiz_service: QuizService):
     try:
         chat_id = update.effective_chat.id
-        text = update.message.text if update.message else update.channel_post.text.strip()
+        text = update.effective_message.text.strip()
 
         if text.startswith(f"@{BOT_USERNAME} /trigger_audio_dialog"):
             from services.telegram_bot import post_audio
@@ -30,7 +62,11 @@ async def handle_text_command(update: Update, context: ContextTypes.DEFAULT_TYPE
             response = gemini_service.fetch_daily_10_words()
         
         elif text.startswith(f"@{BOT_USERNAME} /remind"):
-            response = gemini_service.fetch_daily_words_reminder()
+            quiz = gemini_service.fetch_daily_words_reminder()
+            if quiz and quiz.questions:
+                await send_quiz(context.bot, chat_id, quiz, quiz_service)
+                return
+            response = "Error: Could not retrieve reminders."
         
         elif text.startswith(f"@{BOT_USERNAME} /news"):
             response = gemini_service.fetch_daily_news()
@@ -42,26 +78,35 @@ async def handle_text_command(update: Update, context: ContextTypes.DEFAULT_TYPE
             response = gemini_service.fetch_weekly_news()
 
         elif text.startswith(f"@{BOT_USERNAME} /quiz"):
-            response = gemini_service.fetch_daily_quiz()
+            quiz = gemini_service.fetch_daily_quiz()
+            if quiz and quiz.questions:
+                await send_quiz(context.bot, chat_id, quiz, quiz_service)
+                return
+            response = "Error: Could not retrieve daily quiz."
 
         elif text.startswith(f"@{BOT_USERNAME} /text"):
             response = gemini_service.fetch_daily_text()
 
+        elif text.startswith(f"@{BOT_USERNAME} /usage"):
+            is_admin_chat = Config().USAGE_ADMIN_CHAT_ID is not None and chat_id == Config().USAGE_ADMIN_CHAT_ID
+            response = gemini_service.ledger.report(chat_id, include_all_chats=is_admin_chat)
+
         else:
             response = (
                 "Cześć! Rozumiem tylko wybrane komendy. Oto co potrafię (Here is what I can do):\n\n"
                 "📚 *Nauka (Learning)*:\n"
                 "• `/text` - Generates a new engaging Polish text (B1) with science facts\n"
-                "• `/quiz` - Generates a short grammar quiz based on our past conversation\n"
+                "• `/quiz` - Posts a short grammar quiz (as polls) based on our past conversation\n"
                 "• `/repeat` - Gives 10 new words (B1) on a specific topic\n"
-                "• `/remind` - A quick definitions game using 10 words we learned earlier\n"
+                "• `/remind` - A quick definitions quiz (as polls) using 10 words we learned earlier\n"
                 "• `/trigger_audio_dialog` - Posts a 3-minute Polish podcast about science\n"
                 "• `/ask [pytanie]` - Ask me anything, I am your Polish tutor!\n\n"
                 "📰 *Wiadomości i Pogoda (News & Weather)*:\n"
                 "• `/news` - Top 10 breaking news from today\n"
                 "• `/weekly` - 5 most hot/discussed global news from the past week\n"
                 "• `/wether` - Daily weather forecast for Gdańsk\n"
-                "• `/search [query]` - Ask me to search the web for any info\n\n"
+                "• `/search [query]` - Ask me to search the web for any info\n"
+                "• `/usage` - Today's AI token usage and quota for this chat\n\n"
                 "📸 *Inne (Other)*:\n"
                 "• Send me any *Image* with a caption to analyze it or ask about it.\n"
                 "• Send me a *Voice Message* and I'll transcribe/answer it!"
@@ -69,6 +114,9 @@ async def handle_text_command(update: Update, context: ContextTypes.DEFAULT_TYPE
 
         await context.bot.send_message(chat_id=chat_id, text=response)
 
+    except QuotaExceededError as e:
+        logger.info(f"{e}, aborting text command")
+        await context.bot.send_message(chat_id=chat_id, text=QUOTA_EXCEEDED_MESSAGE)
     except Exception as e:
         logger.error(f"Error occurred: {e} during text handler")
         await context.bot.send_message(chat_id=chat_id, text="An error occurred while processing your message.")
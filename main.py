@@ -1,12 +1,17 @@
 import threading
 from services.gemini_service import GeminiService
-from handlers.image_handler import handle_photo_message
+from handlers.image_handler import handle_photo_message, MEDIA_GROUP
 from handlers.text_input_handlers import handle_text_command
 from handlers.audio_handler import handle_voice_message
+from handlers.quiz_handler import handle_poll_answer
+from services.quiz_service import QuizService
+from services.usage_ledger import UsageLedger, parse_quota_overrides
 from scheduler import setup_scheduler
 from utils.init_environment import Config
 from server import start_http_server
-from telegram.ext import Application, MessageHandler, filters
+from services.http_transport import telegram_request, TELEGRAM_POLLING_POOL_SIZE
+from services.telegram_bot import set_bot
+from telegram.ext import Application, MessageHandler, PollAnswerHandler, filters
 import os
 from utils.logger import setup_logger, get_logger
 
@@ -21,22 +26,36 @@ def main():
     http_thread.start()
     logger.info('Server started')
 
+    ledger = UsageLedger(
+        daily_token_quota=config.CHAT_DAILY_TOKEN_QUOTA,
+        quota_overrides=parse_quota_overrides(config.CHAT_QUOTA_OVERRIDES)
+    )
     gemini_service = GeminiService(
-        api_key=config.GEMINI_API_KEY
+        api_key=config.GEMINI_API_KEY,
+        ledger=ledger
     )
+    quiz_service = QuizService()
     
-    application = Application.builder().token(config.TELEGRAM_BOT_TOKEN).build()
+    application = (
+        Application.builder()
+        .token(config.TELEGRAM_BOT_TOKEN)
+        .request(telegram_request("bot"))
+        .get_updates_request(telegram_request("polling", pool_size=TELEGRAM_POLLING_POOL_SIZE))
+        .build()
+    )
+    set_bot(application.bot)
     logger.info('Bot application built')
 
-    application.add_handler(MessageHandler(filters.TEXT & filters.Regex(f"@{config.BOT_USERNAME}"), lambda update, context: handle_text_command(update, context, gemini_service)))
-    application.add_handler(MessageHandler(filters.PHOTO & filters.CaptionRegex(f"@{config.BOT_USERNAME}"), lambda update, context: handle_photo_message(update, context, gemini_service)))
+    application.add_handler(MessageHandler(filters.TEXT & filters.Regex(f"@{config.BOT_USERNAME}"), lambda update, context: handle_text_command(update, context, gemini_service, quiz_service)))
+    application.add_handler(MessageHandler(filters.PHOTO & (filters.CaptionRegex(f"@{config.BOT_USERNAME}") | MEDIA_GROUP), lambda update, context: handle_photo_message(update, context, gemini_service)))
     
     application.add_handler(MessageHandler(filters.VOICE | filters.AUDIO, lambda update, context: handle_voice_message(update, context, gemini_service)))
+    application.add_handler(PollAnswerHandler(lambda update, context: handle_poll_answer(update, context, quiz_service)))
 
     logger.info('Message Handlers bound')
 
     async def on_startup(app):
-        await setup_scheduler(gemini_service)
+        await setup_scheduler(gemini_service, quiz_service)
         logger.info('Scheduler started')
 
     application.post_init = on_startup
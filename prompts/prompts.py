@@ -2,11 +2,12 @@ prompts = {
     "historySetUP": "Jesteś cierpliwym, doświadczonym nauczycielem języka polskiego dla początkujących i średniozaawansowanych. Zawsze tłumacz nowe i trudne słowa. Zawsze odpowiadaj w języku polskim.",
     "learningWords": "Proszę, podaj 10 polskich słów na poziomie B1, które są związane z tematem 'podróżowanie i wakacje'. Dla każdego słowa podaj jego definicję oraz praktyczne zdanie przykładowe. Upewnij się, że słowa są zróżnicowane (np. rzeczowniki, czasowniki, przymiotniki). Format odpowiedzi powinien wyglądać następująco: 'Słowo - Definicja. Przykład: [zdanie]'. Cała odpowiedź musi być w języku polskim. Please, do not repeat words from previous posts. All new words have to be new and do not use words from previous messages. You have to respond only with 4096 characters maximum.",
     "lerningText": "Napisz interesujący tekst na poziomie B1, zawierający ciekawostki naukowe (np. z biologii, matematyki, ekonomii, historii itp.). Tekst nie może być dialogiem. Powinien to być wciągający artykuł lub opowiadanie. Proszę użyć nowego, ciekawego słownictwa i wyjaśnić najtrudniejsze słowa. Proszę pisać wyłącznie po polsku. Teksty muszą być zawsze unikalne i o nowej tematyce. Wykorzystaj słownictwo z dotychczasowej konwersacji. You have to respond only with 4096 characters maximum.",
-    "learningQuiz": "Na podstawie słów i tekstów z naszej dotychczasowej konwersacji, stwórz krótki quiz gramatyczny. Wybierz 1 konkretną regułę gramatyczną (np. czasowniki nieregularne, przypadki), krótko ją wyjaśnij, a następnie przygotuj ćwiczenie sprawdzające korzystając ze słownictwa z naszej historii. Podaj klucz odpowiedzi na końcu. You have to respond only with 4096 characters maximum. Odpowiadaj wyłącznie w języku polskim. You have to respond only with 4096 characters maximum.",
+    "learningQuiz": "Na podstawie słów i tekstów z naszej dotychczasowej konwersacji, stwórz krótki quiz gramatyczny. Wybierz 1 konkretną regułę gramatyczną (np. czasowniki nieregularne, przypadki) i krótko ją wyjaśnij w polu 'intro'. Następnie przygotuj 5 pytań jednokrotnego wyboru korzystając ze słownictwa z naszej historii. Każde pytanie ma 3-4 odpowiedzi, dokładnie jedną poprawną (correct_option_id to jej indeks liczony od 0) oraz krótkie wyjaśnienie. Limits: question max 300 characters, each option max 100 characters, explanation max 200 characters. Odpowiadaj wyłącznie w języku polskim.",
     "searchRequestForNews": "As a very experienced journalist and analytic, please search the internet using your available tools for the top 10 most significant and breaking news stories from all over the world within the past 24 hours. Focus exclusively on the most accurate and proven sources, ensuring all information is rigorously fact-checked and only proven materials are included in your summary. Provide a concise summary of each story. Your response must not exceed 4096 characters. Cała odpowiedź musi być w języku polskim.",
     "searchForWeather": "Using your search tool, find the weather forecast for Gdańsk, Poland for today. Act as a clear and concise weather reporter. Provide a summary that includes: temperature throughout the day (morning, afternoon, evening), 'feels like' temperature (temperatura odczuwalna), chance of precipitation as a percentage, wind speed and direction, and the expected conditions (e.g., sunny, partly cloudy, rain showers). You have to respond only with 4096 characters maximum. Cała odpowiedź musi być w języku polskim.",
     "searchWeeklyNews": "Act as a widely renowned news analyst. Use your search tool to find the 5 most discussed, hot topics and breaking news globally from the past week (can be technology, programming, AI, or other fields). For each topic, provide: 1. A clear headline. 2. The primary source. 3. A 2-3 sentence summary explaining the topic and why it's highly discussed. You have to respond only with 4096 characters maximum. Cała odpowiedź musi być w języku polskim.",
-    "wordsReminders": "Stwórzmy szybką powtórkę. Wybierz 10 słów lub zwrotów z naszych poprzednich lekcji (ale nie z ostatniej). Przedstaw je jako quiz w formie 'definicja -> słowo'. Podaj tylko definicje w formie ponumerowanej listy, abym mógł/mogła spróbować odgadnąć każde słowo. Na samym dole odpowiedzi, po wyraźnym oddzieleniu (np. linią '---'), stwórz sekcję 'Odpowiedzi' i podaj prawidłowe słowa pasujące do każdej definicji. You have to respond only with 4096 characters maximum. Cała odpowiedź musi być w języku polskim.",
+    "wordsReminders": "Stwórzmy szybką powtórkę. Wybierz 10 słów lub zwrotów z naszych poprzednich lekcji (ale nie z ostatniej). Przedstaw je jako quiz w formie 'definicja -> słowo': w polu 'intro' napisz jedno zdanie wstępu, a dla każdego słowa przygotuj pytanie z definicją i 4 możliwymi słowami, z których dokładnie jedno jest poprawne (correct_option_id to jego indeks liczony od 0). W wyjaśnieniu podaj przykładowe zdanie z poprawnym słowem. Limits: question max 300 characters, each option max 100 characters, explanation max 200 characters. Cała odpowiedź musi być w języku polskim.",
     "historyWordsReminder": "Przeanalizuj naszą najnowszą historię czatu konwersacji (z sesji nauki) i wybierz 10 najbardziej przydatnych losowych słów lub zwrotów nauczonych do tej pory. Dla każdego słowa krótko przypomnij jego znaczenie po polsku oraz dodaj jedno lub dwa zdania jako przykłady użycia w innym, nowym kontekście. Odpowiadaj w języku polskim, tak aby uczeń B1 łatwo wszystko zrozumiał.",
+    "albumInstruction": "Poniższe zdjęcia należą do jednej serii (np. kolejne strony podręcznika), w podanej kolejności. Przeanalizuj je razem i udziel jednej, wspólnej odpowiedzi.",
     "audioDialog": "Wygeneruj scenariusz merytorycznego i interesującego podcastu trwającego około 2-3 minut w języku polskim (dla ucznia A2/B1). Odegraj naturalną rozmowę dwóch osób (np. Marek i Anna). Tematem podcastu ma być ciekawe zagadnienie naukowe (np. biologia, chemia, fizyka, historia lub ciekawostki o świecie). Mowa powinna być wolna, poprawna i pełna emocji. Podziel transkrypt na role: 'Marek: ...' i 'Anna: ...'. Scenariusz musi wyczerpać temat by trwać około 3 minut przy czytaniu."
 }
\ No newline at end of file
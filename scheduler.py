@@ -1,22 +1,24 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from services.gemini_service import GeminiService
-from services.telegram_bot import post_text, post_audio
+from services.telegram_bot import post_text, post_audio, post_quiz
+from services.quiz_service import QuizService
+from services.usage_ledger import usage_scope
+from services.http_transport import get_sync_client, pool_stats
 from utils.init_environment import Config
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 def keep_alive(url: str):
-    import requests
     try:
         if url:
-            requests.get(url)
-            logger.info("Pinged self to keep alive.")
+            get_sync_client().get(url)
+            logger.info(f"Pinged self to keep alive. Pool stats: {pool_stats()}")
     except Exception as e:
         logger.info(f"Failed to keep alive: {e}")
 
 
-async def setup_scheduler(gemini_service: GeminiService):
+async def setup_scheduler(gemini_service: GeminiService, quiz_service: QuizService):
     
     async def fetch_daily_words():
       await post_text("fetch_daily_10_words", gemini_service)
@@ -25,10 +27,10 @@ async def setup_scheduler(gemini_service: GeminiService):
        await post_text("fetch_daily_text", gemini_service)
 
     async def fetch_daily_quiz():
-       await post_text("fetch_daily_quiz", gemini_service)
+       await post_quiz("fetch_daily_quiz", gemini_service, quiz_service)
     
     async def fetch_daily_words_reminder():
-       await post_text("fetch_daily_words_reminder", gemini_service)
+       await post_quiz("fetch_daily_words_reminder", gemini_service, quiz_service)
 
     async def fetch_history_words_reminder():
        await post_text("fetch_history_words_reminder", gemini_service)
@@ -59,8 +61,14 @@ async def setup_scheduler(gemini_service: GeminiService):
     ]
     scheduler = AsyncIOScheduler()
 
+    async def run_scheduled(func):
+        # Scheduled broadcasts are attributed to the job but never blocked by chat quotas.
+        # User-triggered posts (e.g. /trigger_audio_dialog) keep the caller's enforced scope.
+        with usage_scope(Config().TELEGRAM_CHANNEL_ID, f"job:{func.__name__}", enforce=False):
+            await func()
+
     for job in jobs:
-        scheduler.add_job(job["func"], 'cron', **job["cron"])
+        scheduler.add_job(run_scheduled, 'cron', args=[job["func"]], **job["cron"])
 
     scheduler.add_job(lambda: keep_alive(Config().RENDER_EXTERNAL_URL), 'interval', minutes=10)
     scheduler.start()
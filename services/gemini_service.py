@@ -1,6 +1,13 @@
 
 from utils.logger import get_logger
 from prompts.prompts import prompts
+from services.http_transport import genai_http_options, register_genai_client, GEMINI_POOL_SIZE
+from services.quiz_service import Quiz
+from services.model_router import ModelRouter
+from services.usage_ledger import UsageLedger, QuotaExceededError
+from utils.audio_processing import preprocess_audio
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
 from google import genai
 from google.genai import types
 import json
@@ -10,12 +17,25 @@ import io
 logger = get_logger(__name__)
 
 class GeminiService:
-    def __init__(self, api_key: str):
-        self.client = genai.Client(api_key=api_key)
+    def __init__(self, api_key: str, ledger: UsageLedger | None = None):
+        self.client = genai.Client(api_key=api_key, http_options=genai_http_options())
+        register_genai_client(self.client)
         self.model = "gemini-3.1-flash-lite-preview" 
         self.model_for_search = "gemini-2.5-flash-lite"
         self.tutor_model = "gemini-3.1-flash-lite-preview" 
         self.output_audio_model = "gemini-2.5-flash-preview-tts"
+        self.fallback_model = "gemini-2.5-flash"
+        self.ledger = ledger or UsageLedger()
+        # Text/vision models can be swapped for one another; TTS is pinned to output_audio_model.
+        self.router = ModelRouter(
+            fallbacks={
+                self.model: self.model_for_search,
+                self.model_for_search: self.fallback_model,
+            },
+            cheap_model=self.model_for_search,
+            max_workers=GEMINI_POOL_SIZE,
+            on_response=self.ledger.record
+        )
         self.sessions_file = "data/sessions.json"
         
         os.makedirs("data", exist_ok=True)
@@ -67,18 +87,38 @@ class GeminiService:
                 contents=[uploaded_file, "\n\n", user_prompt]
             )
             return result.text
+        except QuotaExceededError:
+            raise
         except Exception as e:
             logger.error(f"Error describing image: {e}")
             return "Przepraszam, wystąpił błąd podczas analizy obrazu przez AI."
 
+    def describe_images(self, images: list[bytes], user_prompt: str, mime_type: str = "image/jpeg") -> str:
+        """
+        Analyses several images (e.g. a Telegram album) together in a single request.
+        """
+        try:
+            image_parts = [types.Part.from_bytes(data=image, mime_type=mime_type) for image in images]
+            result = self._generate_content_with_retry(
+                model=self.model,
+                contents=[*image_parts, "\n\n", prompts["albumInstruction"], user_prompt]
+            )
+            return result.text
+        except QuotaExceededError:
+            raise
+        except Exception as e:
+            logger.error(f"Error describing {len(images)} images: {e}")
+            return "Przepraszam, wystąpił błąd podczas analizy obrazów przez AI."
+
     def _generate_content_with_retry(self, *args, **kwargs):
         import time
         max_retries = 3
         delay = 60
         last_e = None
+        self.ledger.check_quota()
         for attempt in range(1, max_retries + 1):
             try:
-                return self.client.models.generate_content(*args, **kwargs)
+                return self.router.generate(self.client.models.generate_content, *args, **kwargs)
             except Exception as e:
                 last_e = e
                 logger.warning(f"Google API Error: {e}. Retry {attempt}/{max_retries} in {delay}s...")
@@ -104,10 +144,38 @@ class GeminiService:
             self._update_history(user_id, "model", response.text.strip())
             
             return response.text.strip()
+        except QuotaExceededError:
+            raise
         except Exception as e:
             logger.error(f"Error in conversation: {e}")
             return "Error: Could not retrieve response."
     
+    def _send_structured_with_history(self, user_id: str, prompt: str, schema):
+        """
+        Like _send_text_with_history, but asks for JSON matching `schema` and returns the parsed model.
+        The model turn is saved to history via the schema's to_text(), not as raw JSON.
+        """
+        history = self._get_history(user_id)
+        contents = [types.Content(role=h["role"], parts=[types.Part(text=h["parts"][0]["text"])]) for h in history]
+        contents.append(types.Content(role="user", parts=[types.Part(text=prompt)]))
+
+        config = types.GenerateContentConfig(
+            system_instruction=self.tutor_instruction.system_instruction,
+            response_mime_type="application/json",
+            response_schema=schema
+        )
+        response = self._generate_content_with_retry(
+            model=self.tutor_model,
+            contents=contents,
+            config=config
+        )
+        parsed = response.parsed if isinstance(response.parsed, schema) else schema.model_validate_json(response.text)
+
+        self._update_history(user_id, "user", prompt)
+        self._update_history(user_id, "model", parsed.to_text())
+
+        return parsed
+
     def fetch_user_request(self, user_request: str, user_id: str = "global"):
         return self._send_text_with_history(user_id, user_request)
 
@@ -121,6 +189,8 @@ class GeminiService:
                 config=config
             )
             return response.text.strip()
+        except QuotaExceededError:
+            raise
         except Exception as e:
             logger.error(f"Error fetching search request: {e}")
             return "Error: Could not retrieve search request."
@@ -136,23 +206,42 @@ class GeminiService:
             wf.writeframes(pcm_data)
         return buffer.getvalue()
 
+    def _transcribe_chunk(self, chunk_bytes: bytes, mime_type: str) -> str:
+        audio_part = types.Part(
+            inline_data=types.Blob(
+                data=chunk_bytes,
+                mime_type=mime_type
+            )
+        )
+        response = self._generate_content_with_retry(
+            model=self.model,
+            contents=[audio_part, "Please transcribe this audio exactly to text. Do not answer questions, just provide the transcription."],
+        )
+        return response.text.strip()
+
+    def _transcribe_audio(self, audio_bytes: bytes, mime_type: str) -> str:
+        """
+        Preprocesses the audio (silence trimming, mono 16 kHz re-encode) and transcribes
+        its chunks in parallel, joining the results in order.
+        """
+        chunks = preprocess_audio(audio_bytes, mime_type)
+        if len(chunks) <= 1:
+            return " ".join(self._transcribe_chunk(data, chunk_mime) for data, chunk_mime in chunks)
+
+        with ThreadPoolExecutor(max_workers=min(len(chunks), GEMINI_POOL_SIZE)) as executor:
+            # Copy the context per chunk so usage stays attributed to the calling chat.
+            futures = [executor.submit(contextvars.copy_context().run, self._transcribe_chunk, *chunk) for chunk in chunks]
+            return " ".join(future.result() for future in futures)
+
     def handle_audio_search_request(self, audio_bytes: bytes, mime_type: str = "audio/ogg", play_audio: bool = False, perform_search: bool = False):
         """
         Takes raw audio bytes, passes them to Gemini for speech-to-text / analysis,
         and asks for an audio response back. Optionally uses Search Grounding.
         """
         try:
-            audio_part = types.Part(
-                inline_data=types.Blob(
-                    data=audio_bytes,
-                    mime_type=mime_type
-                )
-            )
-            transcription_response = self._generate_content_with_retry(
-                model=self.model,
-                contents=[audio_part, "Please transcribe this audio exactly to text. Do not answer questions, just provide the transcription."],
-            )
-            user_question_text = transcription_response.text.strip()
+            user_question_text = self._transcribe_audio(audio_bytes, mime_type)
+            if not user_question_text:
+                return "Nie usłyszałem żadnej wypowiedzi. Spróbuj nagrać wiadomość jeszcze raz.", None
             logger.info(f"Audio transcription complete: {user_question_text}")
 
             tools = [types.Tool(google_search=types.GoogleSearch())]
@@ -211,6 +300,8 @@ class GeminiService:
 
             return text_response, audio_bytes_response
 
+        except QuotaExceededError:
+            raise
         except Exception as e:
             logger.error(f"Error in three-step audio pipeline: {e}")
             return "Przepraszam, usługa Google Gemini jest przeciążona (błąd 503). Spróbowałem 3 razy, ale nadal nie działa. Spróbuj powtórzyć pytanie za kilka minut.", None
@@ -268,6 +359,8 @@ class GeminiService:
             
             logger.warning(f"Multi-speaker dialog synthesis failed. Response: {response}")
             return None
+        except QuotaExceededError:
+            raise
         except Exception as e:
             logger.error(f"Error in multi-speaker dialog pipeline: {e}")
             return None
@@ -275,14 +368,19 @@ class GeminiService:
     def fetch_daily_text(self):
         try:
             return self._send_text_with_history("daily_learning", prompts["lerningText"])
+        except QuotaExceededError:
+            raise
         except Exception as e:
             return "Error: Could not retrieve daily text."
 
-    def fetch_daily_quiz(self):
+    def fetch_daily_quiz(self) -> Quiz | None:
         try:
-            return self._send_text_with_history("daily_learning", prompts["learningQuiz"])
+            return self._send_structured_with_history("daily_learning", prompts["learningQuiz"], Quiz)
+        except QuotaExceededError:
+            raise
         except Exception as e:
-            return "Error: Could not retrieve daily quiz."
+            logger.error(f"Error generating daily quiz: {e}")
+            return None
 
     def fetch_daily_news(self):
         try:
@@ -294,6 +392,8 @@ class GeminiService:
                 config=config
             )
             return response.text.strip()
+        except QuotaExceededError:
+            raise
         except Exception as e:
             return "Error: Could not retrieve daily news."
 
@@ -307,6 +407,8 @@ class GeminiService:
                 config=config
             )
             return response.text.strip()
+        except QuotaExceededError:
+            raise
         except Exception as e:
             return "Error: Could not retrieve daily weather."
 
@@ -320,23 +422,32 @@ class GeminiService:
                 config=config
             )
             return response.text.strip()
+        except QuotaExceededError:
+            raise
         except Exception as e:
             return "Error: Could not retrieve weekly news."
 
     def fetch_daily_10_words(self):
         try:
             return self._send_text_with_history("daily_learning", prompts["learningWords"])
+        except QuotaExceededError:
+            raise
         except Exception as e:
             return "Error: Could not retrieve 10 words."
 
-    def fetch_daily_words_reminder(self):
+    def fetch_daily_words_reminder(self) -> Quiz | None:
         try:
-            return self._send_text_with_history("daily_learning", prompts["wordsReminders"])
+            return self._send_structured_with_history("daily_learning", prompts["wordsReminders"], Quiz)
+        except QuotaExceededError:
+            raise
         except Exception as e:
-            return "Error: Could not retrieve reminders."
+            logger.error(f"Error generating words reminder quiz: {e}")
+            return None
 
     def fetch_history_words_reminder(self):
         try:
             return self._send_text_with_history("daily_learning", prompts["historyWordsReminder"])
+        except QuotaExceededError:
+            raise
         except Exception as e:
             return "Error: Could not retrieve history words reminder."
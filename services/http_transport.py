@@ -0,0 +1,98 @@
+from google.genai import types
+from telegram.request import HTTPXRequest
+from utils.logger import get_logger
+import importlib.util
+import httpx
+
+logger = get_logger(__name__)
+
+# HTTP/2 is only negotiated when the optional `h2` package is installed.
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Pool sizes are matched to how much work can be in flight at once:
+# update handlers plus scheduled broadcasts for Telegram, and a few
+# concurrent generate_content calls (transcription chunks, hedges) for Gemini.
+TELEGRAM_POOL_SIZE = 16
+TELEGRAM_POLLING_POOL_SIZE = 1
+GEMINI_POOL_SIZE = 8
+KEEPALIVE_EXPIRY = 60.0
+
+_telegram_requests: dict[str, HTTPXRequest] = {}
+_sync_client: httpx.Client | None = None
+_genai_client = None
+
+
+def _limits(pool_size: int) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=pool_size,
+        max_keepalive_connections=pool_size,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+
+
+def telegram_request(name: str = "bot", pool_size: int = TELEGRAM_POOL_SIZE) -> HTTPXRequest:
+    """
+    Returns the shared HTTPXRequest registered under `name`, creating it on first use.
+    """
+    if name not in _telegram_requests:
+        _telegram_requests[name] = HTTPXRequest(
+            connection_pool_size=pool_size,
+            pool_timeout=5.0,
+            http_version="2" if HTTP2_AVAILABLE else "1.1",
+            httpx_kwargs={"limits": _limits(pool_size)},
+        )
+        logger.info(f"Telegram transport '{name}' created (pool={pool_size}, http2={HTTP2_AVAILABLE})")
+    return _telegram_requests[name]
+
+
+def genai_http_options() -> types.HttpOptions:
+    """
+    HttpOptions for genai.Client so Gemini calls reuse keep-alive connections.
+    """
+    client_args = {"limits": _limits(GEMINI_POOL_SIZE), "http2": HTTP2_AVAILABLE}
+    return types.HttpOptions(client_args=client_args, async_client_args=dict(client_args))
+
+
+def register_genai_client(client) -> None:
+    global _genai_client
+    _genai_client = client
+
+
+def get_sync_client() -> httpx.Client:
+    """
+    Shared synchronous client for plain HTTP calls (e.g. keep-alive pings).
+    """
+    global _sync_client
+    if _sync_client is None or _sync_client.is_closed:
+        _sync_client = httpx.Client(limits=_limits(2), timeout=10.0, http2=HTTP2_AVAILABLE)
+    return _sync_client
+
+
+def _client_pool_stats(client) -> dict:
+    stats = {"connections": 0, "idle": 0, "active": 0, "pending_requests": 0}
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    if pool is None:
+        return stats
+    connections = list(getattr(pool, "connections", []))
+    stats["connections"] = len(connections)
+    stats["idle"] = sum(1 for c in connections if c.is_idle())
+    stats["active"] = stats["connections"] - stats["idle"]
+    stats["pending_requests"] = sum(1 for r in list(getattr(pool, "_requests", [])) if r.connection is None)
+    stats["max_connections"] = getattr(pool, "_max_connections", None)
+    return stats
+
+
+def pool_stats() -> dict:
+    """
+    Snapshot of connection pool utilisation for every shared client. Reads private
+    httpcore state, so it is only logged from the keep-alive job, never served.
+    """
+    stats = {}
+    for name, request in list(_telegram_requests.items()):
+        stats[f"telegram:{name}"] = _client_pool_stats(getattr(request, "_client", None))
+    if _sync_client is not None:
+        stats["http:sync"] = _client_pool_stats(_sync_client)
+    if _genai_client is not None:
+        api_client = getattr(_genai_client, "_api_client", None)
+        stats["gemini"] = _client_pool_stats(getattr(api_client, "_httpx_client", None))
+    return stats
@@ -0,0 +1,195 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from collections import deque
+from google.genai import types
+import contextvars
+from utils.logger import get_logger
+import threading
+import time
+
+logger = get_logger(__name__)
+
+WINDOW_SIZE = 50
+# p95 is only trusted (and hedging enabled) once a model has this many samples.
+MIN_SAMPLES = 10
+# Models failing more often than this are bypassed in favour of their fallback.
+MAX_ERROR_RATE = 0.5
+# Text-only single-turn prompts shorter than this go to the cheap model.
+SHORT_PROMPT_CHARS = 300
+# Every Nth request still goes to a bypassed model so it can recover.
+PROBE_EVERY = 10
+
+
+class ModelStats:
+    """
+    Rolling latency and error statistics for one model.
+    """
+    def __init__(self, window: int = WINDOW_SIZE):
+        self._lock = threading.Lock()
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+
+    def record(self, latency: float, ok: bool):
+        with self._lock:
+            self.outcomes.append(ok)
+            if ok:
+                self.latencies.append(latency)
+
+    def p95(self) -> float | None:
+        with self._lock:
+            latencies = sorted(self.latencies)
+        if len(latencies) < MIN_SAMPLES:
+            return None
+        return latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+
+    def error_rate(self) -> float:
+        with self._lock:
+            outcomes = list(self.outcomes)
+        if len(outcomes) < MIN_SAMPLES:
+            return 0.0
+        return outcomes.count(False) / len(outcomes)
+
+    def snapshot(self) -> dict:
+        return {"samples": len(self.outcomes), "p95": self.p95(), "error_rate": self.error_rate()}
+
+
+def _flatten(contents) -> list:
+    items = contents if isinstance(contents, list) else [contents]
+    flat = []
+    for item in items:
+        if isinstance(item, types.Content):
+            flat.extend(item.parts or [])
+        else:
+            flat.append(item)
+    return flat
+
+
+def _prompt_chars(contents) -> int:
+    total = 0
+    for item in _flatten(contents):
+        if isinstance(item, str):
+            total += len(item)
+        elif isinstance(item, types.Part) and item.text:
+            total += len(item.text)
+    return total
+
+
+def _has_media(contents) -> bool:
+    return any(not isinstance(item, str) and not (isinstance(item, types.Part) and item.text) for item in _flatten(contents))
+
+
+def request_kind(contents, config=None) -> str:
+    """
+    Coarse request class used to keep separate latency windows per model, so quick
+    transcriptions or short answers don't set the hedge threshold for long generations.
+    """
+    parts = ["media" if _has_media(contents) else "text"]
+    if config is not None:
+        if config.tools:
+            parts.append("search")
+        if config.response_schema:
+            parts.append("json")
+        if config.system_instruction:
+            parts.append("instructed")
+    parts.append("short" if _prompt_chars(contents) < SHORT_PROMPT_CHARS else "long")
+    return "+".join(parts)
+
+
+def _is_simple_prompt(contents) -> bool:
+    if isinstance(contents, list) and len(contents) != 1:
+        return False
+    return not _has_media(contents) and 0 < _prompt_chars(contents) < SHORT_PROMPT_CHARS
+
+
+class ModelRouter:
+    """
+    Picks a model per request from rolling latency/error stats and hedges slow calls:
+    once the chosen model exceeds its observed p95 for this kind of request, the same
+    request is sent to its fallback model and whichever successful response arrives
+    first is returned. Error rates are tracked per model, latency per (model, kind).
+    """
+    def __init__(self, fallbacks: dict[str, str], cheap_model: str, max_workers: int = 8, on_response=None):
+        self.fallbacks = fallbacks
+        # Called as on_response(response, model) for every successful call, including
+        # hedged duplicates that lose the race but are still billed.
+        self.on_response = on_response
+        self.cheap_model = cheap_model
+        self.stats: dict[str, ModelStats] = {}
+        self._stats_lock = threading.Lock()
+        self._bypass_counts: dict[str, int] = {}
+        # Hedges get their own pool so they never queue behind the primaries they race.
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="primary")
+        self._hedge_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+
+    def _stats(self, model: str) -> ModelStats:
+        with self._stats_lock:
+            return self.stats.setdefault(model, ModelStats())
+
+    def select_model(self, model: str, contents) -> str:
+        if model not in self.fallbacks:
+            return model
+        if _is_simple_prompt(contents):
+            model = self.cheap_model
+        fallback = self.fallbacks.get(model)
+        if fallback and self._stats(model).error_rate() > MAX_ERROR_RATE >= self._stats(fallback).error_rate():
+            count = self._bypass_counts[model] = self._bypass_counts.get(model, 0) + 1
+            if count % PROBE_EVERY:
+                logger.warning(f"Model {model} error rate too high, routing to {fallback}")
+                return fallback
+        return model
+
+    def _timed_call(self, call, model: str, kind: str, **kwargs):
+        start = time.monotonic()
+        try:
+            response = call(model=model, **kwargs)
+        except Exception:
+            self._stats(model).record(time.monotonic() - start, ok=False)
+            raise
+        latency = time.monotonic() - start
+        self._stats(model).record(latency, ok=True)
+        self._stats(f"{model}|{kind}").record(latency, ok=True)
+        if self.on_response:
+            self.on_response(response, model)
+        return response
+
+    def generate(self, call, model: str, contents, **kwargs):
+        """
+        Runs `call(model=..., contents=..., **kwargs)` (e.g. client.models.generate_content)
+        on the routed model, hedging to the fallback model when the call runs past p95.
+        """
+        model = self.select_model(model, contents)
+        kind = request_kind(contents, kwargs.get("config"))
+        fallback = self.fallbacks.get(model)
+        hedge_after = self._stats(f"{model}|{kind}").p95()
+        if not fallback or hedge_after is None or self._stats(fallback).error_rate() > MAX_ERROR_RATE:
+            return self._timed_call(call, model, kind, contents=contents, **kwargs)
+
+        started = threading.Event()
+
+        def run_primary():
+            started.set()
+            return self._timed_call(call, model, kind, contents=contents, **kwargs)
+
+        # Each submission runs in a copy of the caller's context so usage attribution follows it.
+        primary = self._executor.submit(contextvars.copy_context().run, run_primary)
+        # The hedge deadline counts from when the primary actually starts, not its queue time.
+        started.wait()
+        done, _ = wait([primary], timeout=hedge_after)
+        if done:
+            return primary.result()
+
+        logger.info(f"Model {model} exceeded p95 for {kind} ({hedge_after:.1f}s), hedging with {fallback}")
+        hedge = self._hedge_executor.submit(contextvars.copy_context().run, self._timed_call, call, fallback, kind, contents=contents, **kwargs)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def snapshot(self) -> dict:
+        with self._stats_lock:
+            models = list(self.stats)
+        return {model: self._stats(model).snapshot() for model in models}
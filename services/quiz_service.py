@@ -0,0 +1,142 @@
+from pydantic import BaseModel, Field
+from utils.logger import get_logger
+import json
+import os
+import uuid
+
+logger = get_logger(__name__)
+
+# Telegram quiz poll limits.
+MAX_QUESTION_LENGTH = 300
+MAX_OPTION_LENGTH = 100
+MAX_EXPLANATION_LENGTH = 200
+MAX_OPTIONS = 10
+MAX_STORED_POLLS = 500
+
+
+class QuizQuestion(BaseModel):
+    question: str = Field(..., description="Question text, max 300 characters")
+    options: list[str] = Field(..., description="2-10 answer options, max 100 characters each")
+    correct_option_id: int = Field(..., description="0-based index of the correct option")
+    explanation: str = Field(..., description="Short explanation of the correct answer, max 200 characters")
+
+
+class Quiz(BaseModel):
+    intro: str = Field(..., description="Short introduction, e.g. the grammar rule being practised")
+    questions: list[QuizQuestion]
+
+    def to_text(self) -> str:
+        """
+        Plain-text rendering (questions with their correct answers) for conversation history.
+        """
+        lines = [self.intro.strip()]
+        for number, question in enumerate(self.questions, 1):
+            correct = question.options[question.correct_option_id] if 0 <= question.correct_option_id < len(question.options) else "?"
+            lines.append(f"{number}. {question.question.strip()} — {correct}")
+        return "\n".join(lines)
+
+
+def _clip(text: str, limit: int) -> str:
+    text = text.strip()
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def to_poll_kwargs(question: QuizQuestion) -> dict | None:
+    """
+    Converts a generated question into send_poll arguments clipped to Telegram's limits.
+    Returns None if the question cannot be posted as a quiz poll.
+    """
+    if not 0 <= question.correct_option_id < len(question.options):
+        return None
+    correct = _clip(question.options[question.correct_option_id], MAX_OPTION_LENGTH)
+
+    # Telegram rejects empty and duplicate options, so drop them and re-index the answer.
+    options = []
+    for option in (_clip(o, MAX_OPTION_LENGTH) for o in question.options):
+        if option and option not in options:
+            options.append(option)
+    options = options[:MAX_OPTIONS]
+    if not question.question.strip() or len(options) < 2 or correct not in options:
+        return None
+    return {
+        "question": _clip(question.question, MAX_QUESTION_LENGTH),
+        "options": options,
+        "correct_option_id": options.index(correct),
+        "explanation": _clip(question.explanation, MAX_EXPLANATION_LENGTH),
+    }
+
+
+class QuizService:
+    """
+    Stores the answer key of every posted quiz poll and grades poll answers locally,
+    so scoring never needs another model call.
+    """
+    def __init__(self, store_file: str = "data/quizzes.json"):
+        self.store_file = store_file
+        os.makedirs(os.path.dirname(store_file), exist_ok=True)
+        data = self._load()
+        self.polls = data.get("polls", {})
+        self.quizzes = data.get("quizzes", {})
+
+    def _load(self):
+        if os.path.exists(self.store_file):
+            try:
+                with open(self.store_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                logger.error(f"Failed to load quizzes: {e}")
+        return {}
+
+    def _save(self):
+        # Write to a temp file and swap it in, so a crash mid-write never loses the answer keys.
+        tmp_file = f"{self.store_file}.tmp"
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({"polls": self.polls, "quizzes": self.quizzes}, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.store_file)
+        except Exception as e:
+            logger.error(f"Failed to save quizzes: {e}")
+
+    def new_quiz(self, chat_id: int) -> str:
+        quiz_id = uuid.uuid4().hex
+        self.quizzes[quiz_id] = {"chat_id": chat_id, "total": 0, "scores": {}}
+        return quiz_id
+
+    def register_poll(self, quiz_id: str, poll_id: str, correct_option_id: int):
+        self.polls[poll_id] = {"quiz_id": quiz_id, "correct_option_id": correct_option_id, "answered": []}
+        self.quizzes[quiz_id]["total"] += 1
+        self._prune()
+        self._save()
+
+    def _prune(self):
+        while len(self.polls) > MAX_STORED_POLLS:
+            oldest = next(iter(self.polls))
+            self.polls.pop(oldest)
+        live_quizzes = {p["quiz_id"] for p in self.polls.values()}
+        for quiz_id in [q for q in self.quizzes if q not in live_quizzes]:
+            self.quizzes.pop(quiz_id)
+
+    def grade_answer(self, poll_id: str, user_id: int, option_ids: list[int]):
+        """
+        Grades a poll answer against the stored key. Returns None for unknown polls or
+        repeated answers, otherwise a dict with `correct`, and `chat_id`, `score` and
+        `total` once the user has answered every question of the quiz.
+        """
+        poll = self.polls.get(poll_id)
+        if not poll or user_id in poll["answered"] or not option_ids:
+            return None
+
+        poll["answered"].append(user_id)
+        quiz = self.quizzes[poll["quiz_id"]]
+        correct = option_ids[0] == poll["correct_option_id"]
+        score = quiz["scores"].setdefault(str(user_id), {"answered": 0, "correct": 0})
+        score["answered"] += 1
+        score["correct"] += int(correct)
+        self._save()
+
+        result = {"correct": correct}
+        if score["answered"] == quiz["total"]:
+            result.update(chat_id=quiz["chat_id"], score=score["correct"], total=quiz["total"])
+        return result
@@ -1,15 +1,39 @@
-from telegram import Bot
+from telegram import Bot, Poll
+from telegram.constants import ChatType
+from telegram.error import BadRequest
 from services.gemini_service import GeminiService
+from services.quiz_service import Quiz, QuizService, to_poll_kwargs
+from services.usage_ledger import QuotaExceededError, QUOTA_EXCEEDED_MESSAGE
 from utils.logger import get_logger
 from datetime import datetime
 from utils.init_environment import Config
 
 config = Config()
 
-bot = Bot(config.TELEGRAM_BOT_TOKEN)
 chat_id = config.TELEGRAM_CHANNEL_ID
 logger = get_logger(__name__)
 
+# Broadcasts reuse the Application's bot so they share its connection pool.
+bot: Bot | None = None
+
+def set_bot(application_bot: Bot):
+    global bot
+    bot = application_bot
+
+def _get_bot() -> Bot:
+    if bot is None:
+        raise RuntimeError("Broadcast bot is not set. Call set_bot() after building the Application.")
+    return bot
+
+# Chat id -> whether only anonymous polls can be posted there (channels).
+_anonymous_poll_chats: dict[int, bool] = {}
+
+async def _anonymous_polls_only(target_bot: Bot, target_chat_id: int) -> bool:
+    if target_chat_id not in _anonymous_poll_chats:
+        chat = await target_bot.get_chat(target_chat_id)
+        _anonymous_poll_chats[target_chat_id] = chat.type == ChatType.CHANNEL
+    return _anonymous_poll_chats[target_chat_id]
+
 async def post_text(triggered_function_name: str, gemini_service: GeminiService):
     try:
         triggered_function = getattr(gemini_service, triggered_function_name)
@@ -18,8 +42,11 @@ async def post_text(triggered_function_name: str, gemini_service: GeminiService)
         else:
             raise AttributeError(f"{triggered_function_name} is not callable.")
         
-        await bot.send_message(chat_id=chat_id, text=message)
+        await _get_bot().send_message(chat_id=chat_id, text=message)
         logger.info(f"Message sent at {datetime.now()}: {message}")
+    except QuotaExceededError as e:
+        logger.info(f"{e}, skipping {triggered_function_name}")
+        await _get_bot().send_message(chat_id=chat_id, text=QUOTA_EXCEEDED_MESSAGE)
     except AttributeError as e:
         logger.error(f"Error: {e} - Method '{triggered_function_name}' not found in GeminiService.")
     except Exception as e:
@@ -39,12 +66,72 @@ async def post_audio(triggered_function_name: str, gemini_service: GeminiService
         
         if not audio_bytes:
             logger.error(f"No audio bytes returned by {triggered_function_name}")
-            await bot.send_message(chat_id=chat_id, text="Przepraszam, nie udało się wygenerować codziennego dźwięku z powodu przeciążenia serwerów API po stronie Google (błąd 503).")
+            await _get_bot().send_message(chat_id=chat_id, text="Przepraszam, nie udało się wygenerować codziennego dźwięku z powodu przeciążenia serwerów API po stronie Google (błąd 503).")
             return
             
-        await bot.send_audio(chat_id=chat_id, audio=audio_bytes, filename="dialog.wav")
+        await _get_bot().send_audio(chat_id=chat_id, audio=audio_bytes, filename="dialog.wav")
         logger.info(f"Audio sent at {datetime.now()} via {triggered_function_name}")
+    except QuotaExceededError as e:
+        logger.info(f"{e}, skipping {triggered_function_name}")
+        await _get_bot().send_message(chat_id=chat_id, text=QUOTA_EXCEEDED_MESSAGE)
     except AttributeError as e:
         logger.error(f"Error: {e} - Method '{triggered_function_name}' not found in GeminiService.")
     except Exception as e:
         logger.error(f"Error posting audio message: {e}")
+
+
+async def send_quiz(target_bot: Bot, target_chat_id: int, quiz: Quiz, quiz_service: QuizService):
+    """
+    Posts a structured quiz as native Telegram quiz polls and stores the answer key
+    so answers can be graded locally. Anonymous polls (channels) never report answers,
+    so their keys are not stored.
+    """
+    if quiz.intro:
+        await target_bot.send_message(chat_id=target_chat_id, text=quiz.intro)
+
+    quiz_id = None
+    # Channels only allow anonymous polls; those cannot be graded per user.
+    is_anonymous = await _anonymous_polls_only(target_bot, target_chat_id)
+    for question in quiz.questions:
+        poll_kwargs = to_poll_kwargs(question)
+        if not poll_kwargs:
+            logger.warning(f"Skipping malformed quiz question: {question}")
+            continue
+        try:
+            message = await target_bot.send_poll(chat_id=target_chat_id, type=Poll.QUIZ, is_anonymous=is_anonymous, **poll_kwargs)
+        except BadRequest as e:
+            if is_anonymous or "non-anonymous polls can't be sent to channel" not in str(e).lower():
+                logger.warning(f"Skipping quiz question rejected by Telegram ({e}): {question}")
+                continue
+            logger.info(f"Non-anonymous poll rejected ({e}), sending anonymous quiz polls to {target_chat_id}.")
+            _anonymous_poll_chats[target_chat_id] = is_anonymous = True
+            message = await target_bot.send_poll(chat_id=target_chat_id, type=Poll.QUIZ, is_anonymous=True, **poll_kwargs)
+        if not is_anonymous:
+            quiz_id = quiz_id or quiz_service.new_quiz(target_chat_id)
+            quiz_service.register_poll(quiz_id, message.poll.id, poll_kwargs["correct_option_id"])
+
+async def post_quiz(triggered_function_name: str, gemini_service: GeminiService, quiz_service: QuizService):
+    """
+    Given a GeminiService method name returning a Quiz, broadcast it to the channel as quiz polls.
+    """
+    try:
+        triggered_function = getattr(gemini_service, triggered_function_name)
+        if callable(triggered_function):
+            quiz = triggered_function()
+        else:
+            raise AttributeError(f"{triggered_function_name} is not callable.")
+
+        if not quiz or not quiz.questions:
+            logger.error(f"No quiz returned by {triggered_function_name}")
+            await _get_bot().send_message(chat_id=chat_id, text="Error: Could not retrieve quiz.")
+            return
+
+        await send_quiz(_get_bot(), chat_id, quiz, quiz_service)
+        logger.info(f"Quiz with {len(quiz.questions)} questions sent at {datetime.now()} via {triggered_function_name}")
+    except QuotaExceededError as e:
+        logger.info(f"{e}, skipping {triggered_function_name}")
+        await _get_bot().send_message(chat_id=chat_id, text=QUOTA_EXCEEDED_MESSAGE)
+    except AttributeError as e:
+        logger.error(f"Error: {e} - Method '{triggered_function_name}' not found in GeminiService.")
+    except Exception as e:
+        logger.error(f"Error posting quiz: {e}")
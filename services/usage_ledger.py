@@ -0,0 +1,168 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date
+from utils.logger import get_logger
+import os
+import sqlite3
+import threading
+
+logger = get_logger(__name__)
+
+# TTS models return 16-bit mono PCM at 24 kHz.
+TTS_BYTES_PER_SECOND = 24000 * 2
+
+QUOTA_EXCEEDED_MESSAGE = "Dzienny limit zapytań do AI dla tego czatu został wyczerpany. Spróbuj jutro! (Daily AI quota reached.)"
+
+_scope: ContextVar[dict | None] = ContextVar("usage_scope", default=None)
+
+
+class QuotaExceededError(Exception):
+    pass
+
+
+@contextmanager
+def usage_scope(chat_id, source: str, enforce: bool = True):
+    """
+    Attributes every Gemini call made inside the block to `chat_id` and `source`
+    (a command, handler or scheduled job). Quotas are skipped when `enforce` is False.
+    """
+    token = _scope.set({"chat_id": str(chat_id), "source": source, "enforce": enforce})
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def current_scope() -> dict:
+    return _scope.get() or {"chat_id": "unknown", "source": "unattributed", "enforce": False}
+
+
+def parse_quota_overrides(raw: str | None) -> dict[str, int]:
+    """
+    Parses "chat_id:tokens,chat_id:tokens" into a dict.
+    """
+    overrides = {}
+    for item in (raw or "").split(","):
+        if ":" in item:
+            chat_id, tokens = item.rsplit(":", 1)
+            overrides[chat_id.strip()] = int(tokens)
+    return overrides
+
+
+def _tts_seconds(response) -> float:
+    total = 0
+    for candidate in response.candidates or []:
+        if candidate.content and candidate.content.parts:
+            for part in candidate.content.parts:
+                blob = part.inline_data
+                if blob and blob.data and (blob.mime_type or "").startswith("audio"):
+                    total += len(blob.data)
+    return total / TTS_BYTES_PER_SECOND
+
+
+class UsageLedger:
+    """
+    Per-chat daily token/TTS ledger backed by SQLite, aggregated on write.
+    """
+    def __init__(self, db_file: str = "data/usage.db", daily_token_quota: int | None = None, quota_overrides: dict[str, int] | None = None):
+        self.daily_token_quota = daily_token_quota
+        self.quota_overrides = quota_overrides or {}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_file), exist_ok=True)
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS usage (
+                day TEXT NOT NULL,
+                chat_id TEXT NOT NULL,
+                source TEXT NOT NULL,
+                model TEXT NOT NULL,
+                calls INTEGER NOT NULL DEFAULT 0,
+                input_tokens INTEGER NOT NULL DEFAULT 0,
+                output_tokens INTEGER NOT NULL DEFAULT 0,
+                tts_seconds REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, chat_id, source, model)
+            )
+        """)
+        self._conn.commit()
+
+    def quota_for(self, chat_id) -> int | None:
+        return self.quota_overrides.get(str(chat_id), self.daily_token_quota)
+
+    def tokens_used_today(self, chat_id) -> int:
+        """
+        Tokens the chat's own requests used today; scheduled broadcasts (job:*) don't count
+        against the quota of the chat they are posted to.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(SUM(input_tokens + output_tokens), 0) FROM usage WHERE day = ? AND chat_id = ? AND source NOT LIKE 'job:%'",
+                (date.today().isoformat(), str(chat_id))
+            ).fetchone()
+        return row[0]
+
+    def has_quota(self, chat_id) -> bool:
+        quota = self.quota_for(chat_id)
+        return quota is None or self.tokens_used_today(chat_id) < quota
+
+    def check_quota(self):
+        """
+        Raises QuotaExceededError if the current scope's chat has used up its daily quota.
+        """
+        scope = current_scope()
+        if scope["enforce"] and not self.has_quota(scope["chat_id"]):
+            raise QuotaExceededError(f"Daily token quota exceeded for chat {scope['chat_id']}")
+
+    def record(self, response, model: str):
+        """
+        Adds the response's usage_metadata (and generated audio length) to the current scope.
+        """
+        try:
+            scope = current_scope()
+            usage = response.usage_metadata
+            input_tokens = (usage.prompt_token_count or 0) + (usage.tool_use_prompt_token_count or 0) if usage else 0
+            output_tokens = (usage.candidates_token_count or 0) + (usage.thoughts_token_count or 0) if usage else 0
+            with self._lock:
+                self._conn.execute("""
+                    INSERT INTO usage (day, chat_id, source, model, calls, input_tokens, output_tokens, tts_seconds)
+                    VALUES (?, ?, ?, ?, 1, ?, ?, ?)
+                    ON CONFLICT (day, chat_id, source, model) DO UPDATE SET
+                        calls = calls + 1,
+                        input_tokens = input_tokens + excluded.input_tokens,
+                        output_tokens = output_tokens + excluded.output_tokens,
+                        tts_seconds = tts_seconds + excluded.tts_seconds
+                """, (date.today().isoformat(), scope["chat_id"], scope["source"], getattr(response, "model_version", None) or model,
+                      input_tokens, output_tokens, _tts_seconds(response)))
+                self._conn.commit()
+        except Exception as e:
+            logger.error(f"Failed to record usage: {e}")
+
+    def report(self, chat_id, day: str | None = None, include_all_chats: bool = False) -> str:
+        """
+        Summarises the chat's usage per source. The top-chats section reveals other chat
+        (and therefore user) ids, so it is only added when `include_all_chats` is set.
+        """
+        day = day or date.today().isoformat()
+        by_chat = []
+        with self._lock:
+            by_source = self._conn.execute("""
+                SELECT source, SUM(calls), SUM(input_tokens), SUM(output_tokens), SUM(tts_seconds)
+                FROM usage WHERE day = ? AND chat_id = ? GROUP BY source ORDER BY SUM(input_tokens + output_tokens) DESC
+            """, (day, str(chat_id))).fetchall()
+            if include_all_chats:
+                by_chat = self._conn.execute("""
+                    SELECT chat_id, SUM(calls), SUM(input_tokens + output_tokens), SUM(tts_seconds)
+                    FROM usage WHERE day = ? GROUP BY chat_id ORDER BY SUM(input_tokens + output_tokens) DESC LIMIT 10
+                """, (day,)).fetchall()
+
+        used = sum(row[2] + row[3] for row in by_source if not row[0].startswith("job:"))
+        quota = self.quota_for(chat_id)
+        lines = [f"📊 Zużycie Gemini ({day}) dla tego czatu (bez zaplanowanych postów): {used} tokenów" + (f" / {quota}" if quota is not None else "")]
+        for source, calls, input_tokens, output_tokens, tts_seconds in by_source:
+            lines.append(f"• {source}: {calls} wywołań, in {input_tokens}, out {output_tokens}" + (f", TTS {tts_seconds:.0f}s" if tts_seconds else ""))
+
+        if include_all_chats:
+            lines.append("\nWszystkie czaty (top 10):")
+        for other_chat, calls, tokens, tts_seconds in by_chat:
+            lines.append(f"• {other_chat}: {calls} wywołań, {tokens} tokenów" + (f", TTS {tts_seconds:.0f}s" if tts_seconds else ""))
+        return "\n".join(lines)
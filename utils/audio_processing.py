@@ -0,0 +1,122 @@
+from concurrent.futures import ThreadPoolExecutor
+from utils.logger import get_logger
+import numpy as np
+import soundfile as sf
+import io
+
+logger = get_logger(__name__)
+
+# Gemini downsamples speech to 16 kHz mono internally, so anything above is wasted payload.
+TARGET_SAMPLE_RATE = 16000
+FRAME_MS = 30
+# A frame counts as speech when it is within this many dB of the loudest frame...
+SPEECH_RELATIVE_DB = -35.0
+# ...and louder than this absolute floor (dBFS).
+SPEECH_FLOOR_DB = -60.0
+EDGE_PADDING_MS = 200
+MAX_CHUNK_SECONDS = 60
+# Chunk boundaries are placed at the quietest frame within this window before the limit.
+SPLIT_SEARCH_SECONDS = 10
+# Mono Opus input (e.g. Telegram voice notes) is already compact; it is only re-encoded
+# when trimming removes at least this fraction of it or it has to be split.
+MIN_TRIM_RATIO = 0.2
+ENCODE_WORKERS = 4
+
+
+def _frame_db(samples: np.ndarray, frame_len: int) -> np.ndarray:
+    n_frames = max(1, int(np.ceil(len(samples) / frame_len)))
+    padded = np.zeros(n_frames * frame_len, dtype=np.float32)
+    padded[:len(samples)] = samples
+    rms = np.sqrt(np.mean(padded.reshape(n_frames, frame_len) ** 2, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def _resample(samples: np.ndarray, rate: int, target_rate: int) -> np.ndarray:
+    if rate <= target_rate:
+        return samples
+    # Windowed-sinc low-pass at the new Nyquist frequency to avoid aliasing.
+    cutoff = 0.5 * target_rate / rate
+    taps = np.arange(-32, 33)
+    kernel = 2 * cutoff * np.sinc(2 * cutoff * taps) * np.hamming(len(taps))
+    filtered = np.convolve(samples, kernel / kernel.sum(), mode="same").astype(np.float32)
+    if rate % target_rate == 0:
+        # Common case (48 kHz Opus -> 16 kHz): plain decimation, no interpolation needed.
+        return filtered[::rate // target_rate]
+    new_times = np.arange(int(len(samples) / rate * target_rate)) / target_rate
+    return np.interp(new_times, np.arange(len(samples)) / rate, filtered).astype(np.float32)
+
+
+def _split_points(frame_db: np.ndarray, frame_len: int, rate: int) -> list[int]:
+    max_frames = int(MAX_CHUNK_SECONDS * rate / frame_len)
+    search_frames = int(SPLIT_SEARCH_SECONDS * rate / frame_len)
+    points, start = [], 0
+    while len(frame_db) - start > max_frames:
+        window = frame_db[start + max_frames - search_frames:start + max_frames]
+        split = start + max_frames - search_frames + int(np.argmin(window))
+        points.append(split * frame_len)
+        start = split
+    return points
+
+
+def _encode(samples: np.ndarray, rate: int) -> tuple[bytes, str]:
+    samples = _resample(samples, rate, TARGET_SAMPLE_RATE)
+    rate = min(rate, TARGET_SAMPLE_RATE)
+    buffer = io.BytesIO()
+    try:
+        sf.write(buffer, samples, rate, format="OGG", subtype="OPUS")
+        return buffer.getvalue(), "audio/ogg"
+    except Exception as e:
+        logger.warning(f"Opus encoding unavailable ({e}), falling back to FLAC.")
+        buffer = io.BytesIO()
+        sf.write(buffer, samples, rate, format="FLAC", subtype="PCM_16")
+        return buffer.getvalue(), "audio/flac"
+
+
+def preprocess_audio(audio_bytes: bytes, mime_type: str = "audio/ogg") -> list[tuple[bytes, str]]:
+    """
+    Decodes audio, trims leading/trailing silence, downmixes to mono, resamples to 16 kHz
+    and re-encodes it compactly. Long recordings are split at quiet points into chunks of
+    at most MAX_CHUNK_SECONDS. Returns a list of (bytes, mime_type) chunks, an empty list
+    if the recording contains no speech, or the original audio if it cannot be decoded
+    or is already compact mono Opus with little silence to trim.
+    This is CPU-bound; call it off the event loop.
+    """
+    try:
+        with sf.SoundFile(io.BytesIO(audio_bytes)) as f:
+            already_compact = f.subtype == "OPUS" and f.channels == 1
+            samples, rate = f.read(dtype="float32", always_2d=True), f.samplerate
+    except Exception as e:
+        logger.warning(f"Could not decode {mime_type} audio, sending it unprocessed: {e}")
+        return [(audio_bytes, mime_type)]
+
+    samples = samples.mean(axis=1)
+    total_samples = len(samples)
+
+    frame_len = int(rate * FRAME_MS / 1000)
+    frame_db = _frame_db(samples, frame_len)
+    threshold = max(frame_db.max() + SPEECH_RELATIVE_DB, SPEECH_FLOOR_DB)
+    voiced = np.flatnonzero(frame_db > threshold)
+    if len(voiced) == 0:
+        logger.info("No speech detected in audio.")
+        return []
+
+    padding = EDGE_PADDING_MS // FRAME_MS
+    start = max(0, voiced[0] - padding)
+    end = min(len(frame_db), voiced[-1] + 1 + padding)
+    samples = samples[start * frame_len:end * frame_len]
+    frame_db = frame_db[start:end]
+
+    bounds = [0] + _split_points(frame_db, frame_len, rate) + [len(samples)]
+    if already_compact and len(bounds) == 2 and len(samples) > (1 - MIN_TRIM_RATIO) * total_samples:
+        logger.info("Audio is already compact mono Opus with little silence, sending it unprocessed.")
+        return [(audio_bytes, mime_type)]
+
+    segments = [samples[a:b] for a, b in zip(bounds, bounds[1:]) if b > a]
+    with ThreadPoolExecutor(max_workers=min(len(segments), ENCODE_WORKERS)) as executor:
+        chunks = list(executor.map(lambda segment: _encode(segment, rate), segments))
+
+    logger.info(
+        f"Audio preprocessed: {len(audio_bytes)} -> {sum(len(c[0]) for c in chunks)} bytes, "
+        f"{len(samples) / rate:.1f}s of speech in {len(chunks)} chunk(s)."
+    )
+    return chunks
@@ -11,6 +11,9 @@ class AppConfigModel(BaseModel):
     GEMINI_API_KEY: str = Field(..., description="API Key for Google Gemini")
     BOT_USERNAME: str = Field(..., description="Telegram Bot Username (without @)")
     RENDER_EXTERNAL_URL: str | None = None
+    CHAT_DAILY_TOKEN_QUOTA: int | None = Field(None, description="Default daily Gemini token quota per chat (unset = unlimited)")
+    CHAT_QUOTA_OVERRIDES: str | None = Field(None, description="Per-chat quotas as 'chat_id:tokens,chat_id:tokens'")
+    USAGE_ADMIN_CHAT_ID: int | None = Field(None, description="Chat allowed to see usage of all chats in /usage")
 
 def _load_env() -> AppConfigModel:
     load_dotenv()
@@ -20,7 +23,10 @@ def _load_env() -> AppConfigModel:
             "TELEGRAM_CHANNEL_ID": os.getenv("TELEGRAM_CHANNEL_ID"),
             "GEMINI_API_KEY": os.getenv("GEMINI_API_KEY"),
             "BOT_USERNAME": os.getenv("BOT_USERNAME"),
-            "RENDER_EXTERNAL_URL": os.getenv("RENDER_EXTERNAL_URL")
+            "RENDER_EXTERNAL_URL": os.getenv("RENDER_EXTERNAL_URL"),
+            "CHAT_DAILY_TOKEN_QUOTA": os.getenv("CHAT_DAILY_TOKEN_QUOTA") or None,
+            "CHAT_QUOTA_OVERRIDES": os.getenv("CHAT_QUOTA_OVERRIDES"),
+            "USAGE_ADMIN_CHAT_ID": os.getenv("USAGE_ADMIN_CHAT_ID") or None
         }
         return AppConfigModel(**config_data)
     except ValidationError as e: